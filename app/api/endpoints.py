@@ -1,21 +1,27 @@
+import asyncio
+import hmac
 import os
-import tempfile
 from fastapi import APIRouter, File, UploadFile, Depends, HTTPException, status
-from app.models.schemas import InterviewReviewRequest, InterviewReviewResponse, TranscriptionResponse
+from app.models.schemas import InterviewReviewRequest, TranscriptionResponse
 from app.services.audio_service import AudioService
 from app.services.transcription_service import TranscriptionService
 from app.services.interview_review_service import InterviewReviewService
 from app.core.dependencies import get_interview_review_service
-from app.config import Settings
+from app.config import settings
 from datetime import datetime
 import logging
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Cached at import so each request does a single constant-time compare
+_EXPECTED_TOKEN = (settings.HARD_CODED_TOKEN or "").encode()
+
 
 def verify_token(token: str):
-    if token != Settings.HARD_CODED_TOKEN:
+    # compare_digest runs in time independent of the token contents,
+    # closing the timing side channel of a plain != comparison
+    if not hmac.compare_digest(token.encode(), _EXPECTED_TOKEN):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authentication credentials"
@@ -25,14 +31,18 @@ def verify_token(token: str):
 async def upload_video(video: UploadFile = File(...),
     token: str = Depends(verify_token)):
     try:
-        # Extract audio from the uploaded video and save it to the temp file
-        temp_audio_path = AudioService.extract_audio_from_video(video)
-        
+        # Extract audio from the uploaded video and save it to the temp file.
+        # ffmpeg and transcription are blocking CPU/IO work, so run them on
+        # worker threads to keep the event loop free for concurrent clients.
+        temp_audio_path = await asyncio.to_thread(AudioService.extract_audio_from_video, video)
+
         # Transcribe the audio using the appropriate model
-        if Settings.AUDIO_MODEL == "GCP":
-            transcription_text = TranscriptionService.audio_to_text_gcp(temp_audio_path)
+        if settings.AUDIO_MODEL == "GCP":
+            transcription_text = await asyncio.to_thread(TranscriptionService.audio_to_text_gcp, temp_audio_path)
+        elif settings.AUDIO_MODEL == "WHISPER":
+            transcription_text = await asyncio.to_thread(TranscriptionService.audio_to_text_fast, temp_audio_path)
         else:
-            transcription_text = TranscriptionService.audio_to_text(temp_audio_path)
+            transcription_text = await asyncio.to_thread(TranscriptionService.audio_to_text, temp_audio_path)
     
         # Generate a structured response payload with a timestamp
         response_payload = TranscriptionResponse(
@@ -46,7 +56,7 @@ async def upload_video(video: UploadFile = File(...),
 
     except Exception as e:
         # Log the error and return a structured error payload with a timestamp
-        logger.error(f"Error during video upload and transcription: {str(e)}")
+        logger.error("Error during video upload and transcription: %s", e)
         error_payload = TranscriptionResponse(
             status="error",
             message="An error occurred during video processing",
@@ -61,14 +71,15 @@ async def upload_video(video: UploadFile = File(...),
             os.remove(temp_audio_path)
 
     
-@router.post("/evaluate-response/", response_model=dict())
+@router.post("/evaluate-response/")
 async def evaluate_response(
     request: InterviewReviewRequest,
     interview_review_service: InterviewReviewService = Depends(get_interview_review_service),
     token: str = Depends(verify_token)
 ):
 
-    review = interview_review_service.generate_review(
+    review = await asyncio.to_thread(
+        interview_review_service.generate_review,
         job_profile=request.job_profile,
         candidate_name=request.candidate_name,
         interview_question=request.interview_question,
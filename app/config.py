@@ -1,18 +1,30 @@
-import os
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
-
-class Settings:
-    OPENAI_API_KEY=os.getenv('OPENAI_API_KEY')
-    OPENAI_TEMPERATURE=os.getenv('OPENAI_TEMPERATURE')
-    OPENAI_MODEL=os.getenv('OPENAI_MODEL')
-    OPENAI_TOP_P=os.getenv('OPENAI_TOP_P')
-    
-    
-    TEMP_DIR=os.getenv('TEMP_DIR')
-    WHISPER_MODEL=os.getenv('WHISPER_MODEL')
-    AUDIO_MODEL=os.getenv('AUDIO_MODEL')
-    
-    HARD_CODED_TOKEN=os.getenv('HARD_CODED_TOKEN')
\ No newline at end of file
+from typing import Optional
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class Settings(BaseSettings):
+    OPENAI_API_KEY: Optional[str] = None
+    OPENAI_TEMPERATURE: float = 0.7
+    OPENAI_MODEL: Optional[str] = None
+    OPENAI_CHEAP_MODEL: Optional[str] = None
+    OPENAI_TOP_P: float = 1.0
+    # Cap completion length to clip the latency tail; fix the seed so
+    # repeated requests are reproducible and therefore safe to cache
+    OPENAI_MAX_TOKENS: int = 1200
+    OPENAI_SEED: int = 42
+
+    TEMP_DIR: Optional[str] = None
+    WHISPER_MODEL: Optional[str] = None
+    AUDIO_MODEL: Optional[str] = None
+
+    REVIEW_CACHE_CODEC: str = 'zstd'
+    SEMANTIC_CACHE_ENABLED: bool = False
+    SEMANTIC_CACHE_THRESHOLD: float = 0.87
+
+    HARD_CODED_TOKEN: Optional[str] = None
+
+    model_config = SettingsConfigDict(env_file='.env', frozen=True)
+
+
+# Parsed and validated once at import; import this instance everywhere
+settings = Settings()
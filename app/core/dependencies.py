@@ -1,4 +1,9 @@
+from functools import lru_cache
 from app.services.interview_review_service import InterviewReviewService
 
+@lru_cache(maxsize=1)
 def get_interview_review_service() -> InterviewReviewService:
+    # Built once per process: the service owns a LangChain chain, prompt,
+    # parser, OpenAI client and disk cache, none of which should be
+    # reconstructed per request
     return InterviewReviewService()
\ No newline at end of file
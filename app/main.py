@@ -1,10 +1,16 @@
 from fastapi import FastAPI
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 from app.api.endpoints import router as api_router
 
-app = FastAPI(title="Interview Analysis API")
+app = FastAPI(title="Interview Analysis API", default_response_class=ORJSONResponse)
 
+app.add_middleware(GZipMiddleware)
 app.include_router(api_router)
 
 if __name__ == "__main__":
+    import os
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    uvicorn.run("app.main:app", host="0.0.0.0", port=8000,
+                loop="uvloop", http="httptools",
+                workers=os.cpu_count(), access_log=False)
\ No newline at end of file
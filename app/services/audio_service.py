@@ -1,18 +1,46 @@
 import os
+import shutil
+import tempfile
 import ffmpeg
 from fastapi import UploadFile
-from app.config import Settings
+from app.config import settings
 
 class AudioService:
+    # Copy buffer for streaming the upload to disk; keeps memory usage
+    # flat regardless of video size
+    COPY_BUFFER_SIZE = 1 << 20
+
     @staticmethod
     def extract_audio_from_video(video_file: UploadFile) -> str:
-        temp_video_path = os.path.join(Settings.TEMP_DIR, "temp_video.mp4")
-        temp_audio_path = os.path.join(Settings.TEMP_DIR, "temp_audio.wav")
-
-        with open(temp_video_path, "wb") as f:
-            f.write(video_file.file.read())
+        # Unique path per request: concurrent uploads must not overwrite
+        # each other's audio or delete it out from under another transcription
+        fd, temp_audio_path = tempfile.mkstemp(dir=settings.TEMP_DIR, suffix=".wav")
+        os.close(fd)
 
-        stream = ffmpeg.input(temp_video_path)
-        stream = ffmpeg.output(stream, temp_audio_path)
-        ffmpeg.run(stream)
+        # Stream the upload's SpooledTemporaryFile straight into ffmpeg's
+        # stdin, skipping the temp_video.mp4 round-trip entirely.
+        # Downmix/resample to 16kHz mono s16 in ffmpeg's SIMD resampler:
+        # that's the format the ASR backends use internally, and it cuts
+        # the intermediate WAV size ~6x versus the source rate
+        stream = ffmpeg.input('pipe:0')
+        stream = ffmpeg.output(stream, temp_audio_path,
+                               vn=None, acodec='pcm_s16le', ac=1, ar=16000,
+                               loglevel='error', **{'threads': 0})
+        process = ffmpeg.run_async(stream.overwrite_output(), pipe_stdin=True,
+                                   pipe_stderr=True)
+        try:
+            shutil.copyfileobj(video_file.file, process.stdin, AudioService.COPY_BUFFER_SIZE)
+        except BrokenPipeError:
+            # ffmpeg exited before consuming the whole upload; fall through
+            # so its stderr diagnostic is raised instead of a bare pipe error
+            pass
+        try:
+            process.stdin.close()
+        except BrokenPipeError:
+            pass
+        # Drain stderr before wait() so a chatty ffmpeg cannot block on a
+        # full pipe; loglevel=error keeps this to actual diagnostics
+        stderr_output = process.stderr.read()
+        if process.wait():
+            raise ffmpeg.Error('ffmpeg', None, stderr_output)
         return temp_audio_path
@@ -1,19 +1,71 @@
+import asyncio
+import hashlib
 import json
 import os
 import logging
+import threading
 import zlib
+from concurrent.futures import Future
+import httpx
+import lz4.frame as lz4f
+import numpy as np
+import orjson
+import zstandard
 from langchain_core.output_parsers import JsonOutputParser
-from langchain_core.prompts import PromptTemplate
+from langchain_core.messages import SystemMessage
+from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.pydantic_v1 import BaseModel, Field
-from langchain_openai import ChatOpenAI
-from app.config import Settings
-from typing import List
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from openai import OpenAI
+from app.config import settings
+from typing import List, Optional
 from diskcache import Cache, Disk, UNKNOWN
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Maximum candidates reviewed in a single batched LLM call
+MAX_REVIEW_BATCH = 8
+
+# Cap on concurrent OpenAI calls to stay inside rate limits
+MAX_CONCURRENT_REVIEWS = 8
+
+# Bump whenever the review prompt or schema changes so stale cached
+# reviews can be dropped in one evict() instead of nuking the directory
+PROMPT_VERSION = "v1"
+_CACHE_TAG = f"prompt:{PROMPT_VERSION}"
+
+# One HTTP client pair shared by every OpenAI-backed client in this module
+# so the primary, cheap and embedding tiers reuse a single connection pool
+# and TLS session instead of each holding their own
+_HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=50)
+_SHARED_HTTP_CLIENT = httpx.Client(http2=True, limits=_HTTP_LIMITS)
+_SHARED_ASYNC_HTTP_CLIENT = httpx.AsyncClient(http2=True, limits=_HTTP_LIMITS)
+
+# Transcripts longer than this skip the cheap tier: on long answers the
+# small model's output rarely survives validation, so attempting it just
+# adds a wasted round trip before the escalation
+CHEAP_ROUTE_MAX_CHARS = 4000
+
+# Transcripts with fewer words than this get a canned lowest-score review
+# instead of an LLM call
+MIN_TRANSCRIPT_WORDS = 5
+
+# Compact response-shape example used in place of the JSON-Schema dump from
+# get_format_instructions(), which costs hundreds of input tokens per call
+# for the same steering effect
+_COMPACT_SCHEMA = (
+    'Respond with JSON of exactly this shape:\n'
+    '{"candidate_name": "...", "job_profile": "...", "interview_question": "...", '
+    '"transcript_analysis": {"question_relevance": "...", "answer_completeness": "...", '
+    '"content_analysis": {...}, "communication_skills": {...}, "critical_thinking": {...}, '
+    '"professional_demeanor": {...}, "technical_proficiency": {...}, "soft_skills": {...}, '
+    '"cultural_fit": {...}}, '
+    '"areas_for_improvement": ["..."], "scoring": {"<aspect>": 0, "overall_score": 0.0}, '
+    '"summary": {...}, "recommendation": "..."}'
+)
+
 
 class TranscriptAnalysis(BaseModel):
     question_relevance: str = Field(description="Assessment of how well the answer relates to the question")
@@ -37,62 +89,194 @@ class InterviewReview(BaseModel):
     recommendation: str = Field(description="Final recommendation regarding the candidate")
 
 class JSONDisk(Disk):
-    def __init__(self, directory, compress_level=1, **kwargs):
+    """diskcache Disk that stores values as compressed JSON.
+
+    The codec is chosen via REVIEW_CACHE_CODEC: zstd at level 3 (the
+    default) decompresses roughly an order of magnitude faster than zlib
+    on these highly redundant review payloads at a similar ratio, lz4
+    trades a little ratio for the fastest inflate when cache hits
+    dominate, zlib is kept for reading caches written before the switch,
+    and none disables compression entirely.
+    """
+
+    def __init__(self, directory, compress_level=3, **kwargs):
         self.compress_level = compress_level
+        codec = settings.REVIEW_CACHE_CODEC
+        if codec == 'zstd':
+            self._compress = zstandard.ZstdCompressor(level=compress_level).compress
+            self._decompress = zstandard.ZstdDecompressor().decompress
+        elif codec == 'lz4':
+            self._compress = lambda data: lz4f.compress(data, compression_level=self.compress_level)
+            self._decompress = lz4f.decompress
+        elif codec == 'zlib':
+            self._compress = lambda data: zlib.compress(data, self.compress_level)
+            self._decompress = zlib.decompress
+        elif codec == 'none':
+            self._compress = self._decompress = lambda data: data
+        else:
+            raise ValueError(f"Unsupported REVIEW_CACHE_CODEC: {codec!r}")
         super().__init__(directory, **kwargs)
 
+    # orjson emits and consumes bytes directly, skipping the extra UTF-8
+    # encode/decode pass stdlib json required on every cache round trip
+
     def put(self, key):
-        json_bytes = json.dumps(key).encode('utf-8')
-        data = zlib.compress(json_bytes, self.compress_level)
+        data = self._compress(orjson.dumps(key))
         return super().put(data)
 
     def get(self, key, raw):
         data = super().get(key, raw)
-        return json.loads(zlib.decompress(data).decode('utf-8'))
+        return orjson.loads(self._decompress(data))
 
     def store(self, value, read, key=UNKNOWN):
         if not read:
-            json_bytes = json.dumps(value).encode('utf-8')
-            value = zlib.compress(json_bytes, self.compress_level)
+            value = self._compress(orjson.dumps(value))
         return super().store(value, read, key=key)
 
     def fetch(self, mode, filename, value, read):
         data = super().fetch(mode, filename, value, read)
         if not read:
-            data = json.loads(zlib.decompress(data).decode('utf-8'))
+            data = orjson.loads(self._decompress(data))
         return data
 
+def _trivial_review(job_profile: str, candidate_name: str, interview_question: str) -> dict:
+    # Canned lowest-score review for empty or throwaway transcripts
+    # ("skip", "n/a", silence) - no API round trip needed to score these
+    note = "No substantive response was provided to evaluate."
+    return {
+        "candidate_name": candidate_name,
+        "job_profile": job_profile,
+        "interview_question": interview_question,
+        "transcript_analysis": {
+            "question_relevance": note,
+            "answer_completeness": note,
+            "content_analysis": {},
+            "communication_skills": {},
+            "critical_thinking": {},
+            "professional_demeanor": {},
+            "technical_proficiency": {},
+            "soft_skills": {},
+            "cultural_fit": {},
+        },
+        "areas_for_improvement": ["No substantive response provided"],
+        "scoring": {"overall_score": 1.0},
+        "summary": {"overall": note},
+        "recommendation": "Unable to recommend: the candidate gave no substantive answer to this question.",
+    }
+
+
 class InterviewReviewService:
     def __init__(self):
-        self.model = ChatOpenAI(api_key=Settings.OPENAI_API_KEY,
-                                temperature=Settings.OPENAI_TEMPERATURE,
-                                model_name=Settings.OPENAI_MODEL,
-                                top_p=Settings.OPENAI_TOP_P)
+        self.model = ChatOpenAI(api_key=settings.OPENAI_API_KEY,
+                                temperature=settings.OPENAI_TEMPERATURE,
+                                model_name=settings.OPENAI_MODEL,
+                                top_p=settings.OPENAI_TOP_P,
+                                max_tokens=settings.OPENAI_MAX_TOKENS,
+                                seed=settings.OPENAI_SEED,
+                                http_client=_SHARED_HTTP_CLIENT,
+                                http_async_client=_SHARED_ASYNC_HTTP_CLIENT)
         self.parser = JsonOutputParser(pydantic_object=InterviewReview)
         
-        self.prompt = PromptTemplate(
-            template="""Analyze the provided interview question and transcript for the candidate applying for the specified job position. Provide a comprehensive evaluation based on the given information.
+        # The long instruction block lives in a fully static system message
+        # (no interpolation) so it is byte-identical across calls and
+        # eligible for OpenAI's automatic prompt-prefix caching; only the
+        # short per-candidate fields travel in the human message.
+        review_instructions = SystemMessage(content=(
+            "Analyze the provided interview question and transcript for the candidate "
+            "applying for the specified job position. Provide a comprehensive evaluation "
+            "based on the given information.\n\n"
+            + _COMPACT_SCHEMA +
+            "\n\nEnsure all scores are on a scale of 1-5. The overall_score should be an "
+            "average of the other scores, rounded to one decimal place. Include an "
+            "assessment of how well the candidate understood and addressed the specific "
+            "interview question."
+        ))
 
-            {format_instructions}
+        self.prompt = ChatPromptTemplate.from_messages([
+            review_instructions,
+            ("human", "Candidate Name: {candidate_name}\n"
+                      "Job Profile: {job_profile}\n"
+                      "Interview Question: {interview_question}\n"
+                      "Transcript: {interview_transcription}")
+        ])
 
-            Candidate Name: {candidate_name}
-            Job Profile: {job_profile}
-            Interview Question: {interview_question}
-            Transcript: {interview_transcription}
-
-            Ensure all scores are on a scale of 1-5. The overall_score should be an average of the other scores, rounded to one decimal place. Include an assessment of how well the candidate understood and addressed the specific interview question.
-            """,
-            input_variables=["candidate_name", "job_profile", "interview_question", "interview_transcription"],
-            partial_variables={"format_instructions": self.parser.get_format_instructions()}
-        )
-        
         self.chain = self.prompt | self.model | self.parser
-        
-        # Initialize cache with JSONDisk
+
+        batch_instructions = SystemMessage(content=(
+            "Analyze the provided interview questions and transcripts for each of the "
+            "candidates below. Provide a comprehensive evaluation for every candidate "
+            "based on the given information.\n\nEach review must follow this format:\n"
+            + _COMPACT_SCHEMA +
+            "\n\nEnsure all scores are on a scale of 1-5. The overall_score should be an "
+            "average of the other scores, rounded to one decimal place. Include an "
+            "assessment of how well each candidate understood and addressed their "
+            "specific interview question.\nRespond with a single JSON object mapping "
+            'each candidate number to its review, e.g. {"1": {...}, "2": {...}}.'
+        ))
+
+        self.batch_prompt = ChatPromptTemplate.from_messages([
+            batch_instructions,
+            ("human", "{candidates}")
+        ])
+
+        self.batch_chain = self.batch_prompt | self.model | self.parser
+
+        # Optional semantic cache: embed the inputs and reuse the review of
+        # the closest previously-seen request when cosine similarity clears
+        # the configured threshold. The exact-match diskcache lookup stays
+        # the fast first check; the embedding only runs on a miss.
+        if settings.SEMANTIC_CACHE_ENABLED:
+            self.embeddings = OpenAIEmbeddings(api_key=settings.OPENAI_API_KEY,
+                                               model="text-embedding-3-small",
+                                               http_client=_SHARED_HTTP_CLIENT,
+                                               http_async_client=_SHARED_ASYNC_HTTP_CLIENT)
+        else:
+            self.embeddings = None
+        # Known limitation: the index lives in memory only, so it starts
+        # empty on every restart (and per worker process) even though the
+        # reviews it points at persist in the diskcache; it re-warms as
+        # requests arrive. Guarded by a lock because generate_review runs
+        # on to_thread worker threads.
+        self._semantic_keys: List[str] = []
+        self._semantic_matrix = None
+        self._semantic_lock = threading.Lock()
+
+        # Optional cascade: try a cheaper model first and only escalate to
+        # OPENAI_MODEL when its output fails validation
+        if settings.OPENAI_CHEAP_MODEL:
+            cheap_model = ChatOpenAI(api_key=settings.OPENAI_API_KEY,
+                                     temperature=settings.OPENAI_TEMPERATURE,
+                                     model_name=settings.OPENAI_CHEAP_MODEL,
+                                     top_p=settings.OPENAI_TOP_P,
+                                     max_tokens=settings.OPENAI_MAX_TOKENS,
+                                     seed=settings.OPENAI_SEED,
+                                     http_client=_SHARED_HTTP_CLIENT,
+                                     http_async_client=_SHARED_ASYNC_HTTP_CLIENT)
+            self.cheap_chain = self.prompt | cheap_model | self.parser
+        else:
+            self.cheap_chain = None
+
+        # Initialize cache with JSONDisk: capped at 4GB with LRU eviction so
+        # the review cache cannot grow without bound, and larger blobs are
+        # written as files instead of SQLite rows
         cache_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'interview_cache')
-        self.cache = Cache(directory=cache_dir, disk=JSONDisk, disk_compress_level=6)
+        self.cache = Cache(directory=cache_dir,
+                           size_limit=2**32,
+                           eviction_policy='least-recently-used',
+                           disk_min_file_size=2**16,
+                           tag_index=True,
+                           disk=JSONDisk, disk_compress_level=3)
+
+        # In-flight request map: identical concurrent requests share one
+        # model call instead of each paying for their own
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
 
     def generate_review(self, job_profile: str, candidate_name: str, interview_question: str, interview_transcription: str) -> InterviewReview:
+        if len(interview_transcription.split()) < MIN_TRANSCRIPT_WORDS:
+            logger.info("Transcript below %d words; returning canned review", MIN_TRANSCRIPT_WORDS)
+            return _trivial_review(job_profile, candidate_name, interview_question)
+
         # Create a unique key for caching
         cache_key = self._create_cache_key(job_profile, candidate_name, interview_question, interview_transcription)
         
@@ -101,22 +285,243 @@ class InterviewReviewService:
         if cached_result:
             logger.info("Retrieved result from cache")
             return InterviewReview(**cached_result)
-        
+
+        # Coalesce duplicate concurrent requests: the first caller for a key
+        # computes the review, later identical callers block on its future
+        with self._inflight_lock:
+            pending = self._inflight.get(cache_key)
+            if pending is None:
+                pending = Future()
+                self._inflight[cache_key] = pending
+                owner = True
+            else:
+                owner = False
+        if not owner:
+            logger.info("Waiting on identical in-flight request")
+            return pending.result()
+
+        try:
+            review = self._generate_review_uncached(cache_key, job_profile, candidate_name, interview_question, interview_transcription)
+            pending.set_result(review)
+            return review
+        except BaseException as e:
+            pending.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(cache_key, None)
+
+    def _generate_review_uncached(self, cache_key: str, job_profile: str, candidate_name: str, interview_question: str, interview_transcription: str):
+        # Exact match missed; look for a semantically equivalent past request
+        embedding = None
+        if self.embeddings is not None:
+            try:
+                embedding = self._embed(job_profile, candidate_name, interview_question, interview_transcription)
+            except Exception as e:
+                logger.warning("Embedding for semantic cache failed: %s", e)
+            if embedding is not None:
+                semantic_result = self._semantic_lookup(embedding)
+                if semantic_result:
+                    logger.info("Retrieved result from semantic cache")
+                    return InterviewReview(**semantic_result)
+
         # If not in cache, generate the review
         logger.info("Generating new review using API")
-        review = self.chain.invoke({
+        inputs = {
             "candidate_name": candidate_name,
             "job_profile": job_profile,
             "interview_question": interview_question,
             "interview_transcription": interview_transcription
-        })
-        
+        }
+
+        review = None
+        if self.cheap_chain is not None and len(interview_transcription) <= CHEAP_ROUTE_MAX_CHARS:
+            try:
+                review = self.cheap_chain.invoke(inputs)
+            except Exception as e:
+                logger.warning("Cheap model failed (%s); escalating to %s", e, settings.OPENAI_MODEL)
+            if review is not None and not self._is_valid_review(review):
+                logger.info("Cheap model output failed validation; escalating to %s", settings.OPENAI_MODEL)
+                review = None
+
+        if review is None:
+            review = self.chain.invoke(inputs)
+
         # Cache the result
-        self.cache.set(cache_key, review)
-        
+        self.cache.set(cache_key, review, tag=_CACHE_TAG)
+        if embedding is not None:
+            self._semantic_insert(embedding, cache_key)
+
         return review
 
+    def _embed(self, *parts):
+        vector = self.embeddings.embed_query(" ".join(self._normalize(part) for part in parts))
+        vector = np.asarray(vector, dtype=np.float32)
+        return vector / np.linalg.norm(vector)
+
+    def _semantic_lookup(self, embedding) -> Optional[dict]:
+        # Pick the best key under the lock so the matrix row and its key
+        # cannot come from different snapshots of the index
+        with self._semantic_lock:
+            if self._semantic_matrix is None:
+                return None
+            # Embeddings are unit-normalized, so the dot product is the cosine
+            scores = self._semantic_matrix @ embedding
+            best = int(scores.argmax())
+            if scores[best] < settings.SEMANTIC_CACHE_THRESHOLD:
+                return None
+            best_key = self._semantic_keys[best]
+        return self.cache.get(best_key)
+
+    def _semantic_insert(self, embedding, cache_key: str):
+        row = embedding[None, :]
+        with self._semantic_lock:
+            self._semantic_keys.append(cache_key)
+            if self._semantic_matrix is None:
+                self._semantic_matrix = row
+            else:
+                self._semantic_matrix = np.vstack([self._semantic_matrix, row])
+
+    # Keys a usable review must contain; used to verify cheap-model output
+    _REQUIRED_REVIEW_KEYS = ("transcript_analysis", "scoring", "recommendation")
+
+    @classmethod
+    def _is_valid_review(cls, review) -> bool:
+        return isinstance(review, dict) and all(key in review for key in cls._REQUIRED_REVIEW_KEYS)
+
+    async def agenerate_review(self, job_profile: str, candidate_name: str, interview_question: str, interview_transcription: str) -> InterviewReview:
+        # Async twin of generate_review for callers that overlap several
+        # reviews; shares the same cache entries
+        if len(interview_transcription.split()) < MIN_TRANSCRIPT_WORDS:
+            logger.info("Transcript below %d words; returning canned review", MIN_TRANSCRIPT_WORDS)
+            return _trivial_review(job_profile, candidate_name, interview_question)
+
+        cache_key = self._create_cache_key(job_profile, candidate_name, interview_question, interview_transcription)
+
+        cached_result = self.cache.get(cache_key)
+        if cached_result:
+            logger.info("Retrieved result from cache")
+            return InterviewReview(**cached_result)
+
+        logger.info("Generating new review using API")
+        review = await self.chain.ainvoke({
+            "candidate_name": candidate_name,
+            "job_profile": job_profile,
+            "interview_question": interview_question,
+            "interview_transcription": interview_transcription
+        })
+
+        self.cache.set(cache_key, review, tag=_CACHE_TAG)
+
+        return review
+
+    async def agenerate_reviews(self, requests: List[dict]) -> List[dict]:
+        """Run several reviews concurrently, bounded by MAX_CONCURRENT_REVIEWS.
+
+        Total wall time collapses to roughly the slowest single call
+        instead of the sum of all of them; ordering follows the input.
+        """
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_REVIEWS)
+
+        async def bounded(request):
+            async with semaphore:
+                return await self.agenerate_review(**request)
+
+        return list(await asyncio.gather(*(bounded(request) for request in requests)))
+
+    def generate_reviews(self, requests: List[dict]) -> List[dict]:
+        """Review several candidates in one LLM call.
+
+        Each request is a dict with job_profile, candidate_name,
+        interview_question and interview_transcription keys. Batching
+        amortizes the shared instruction tokens across the batch; single
+        requests fall back to generate_review.
+        """
+        if len(requests) == 1:
+            return [self.generate_review(**requests[0])]
+
+        reviews = []
+        for start in range(0, len(requests), MAX_REVIEW_BATCH):
+            batch = requests[start:start + MAX_REVIEW_BATCH]
+            sections = []
+            for i, request in enumerate(batch, 1):
+                sections.append(
+                    f"### Candidate {i}:\n"
+                    f"Candidate Name: {request['candidate_name']}\n"
+                    f"Job Profile: {request['job_profile']}\n"
+                    f"Interview Question: {request['interview_question']}\n"
+                    f"Transcript: {request['interview_transcription']}"
+                )
+            logger.info("Generating batched review for %d candidates", len(batch))
+            result = self.batch_chain.invoke({"candidates": "\n\n".join(sections)})
+            for i, request in enumerate(batch, 1):
+                review = result[str(i)]
+                self.cache.set(self._create_cache_key(**request), review, tag=_CACHE_TAG)
+                reviews.append(review)
+        return reviews
+
+    def submit_review_batch(self, requests: List[dict]) -> str:
+        """Submit reviews as an OpenAI Batch API job and return the batch id.
+
+        Meant for non-time-sensitive bulk processing: the Batch API costs
+        roughly half the real-time price and results arrive within the
+        24h completion window. Poll with fetch_review_batch.
+        """
+        client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        lines = []
+        for i, request in enumerate(requests):
+            lines.append(json.dumps({
+                "custom_id": f"review-{i}",
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": settings.OPENAI_MODEL,
+                    "temperature": float(settings.OPENAI_TEMPERATURE),
+                    "messages": [
+                        {"role": "system" if message.type == "system" else "user", "content": message.content}
+                        for message in self.prompt.format_messages(**request)
+                    ],
+                },
+            }))
+        batch_file = client.files.create(
+            file=("interview_reviews.jsonl", "\n".join(lines).encode("utf-8")),
+            purpose="batch"
+        )
+        batch = client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        logger.info("Submitted review batch %s with %d requests", batch.id, len(requests))
+        return batch.id
+
+    def fetch_review_batch(self, batch_id: str) -> Optional[dict]:
+        """Return {custom_id: review} once the batch completes, else None."""
+        client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        batch = client.batches.retrieve(batch_id)
+        if batch.status != "completed":
+            logger.info("Review batch %s not ready (status: %s)", batch_id, batch.status)
+            return None
+        output = client.files.content(batch.output_file_id)
+        results = {}
+        for line in output.text.splitlines():
+            record = json.loads(line)
+            content = record["response"]["body"]["choices"][0]["message"]["content"]
+            results[record["custom_id"]] = self.parser.parse(content)
+        return results
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        # Collapse whitespace and case so trivially reworded copies of the
+        # same posting/transcript (extra spaces, different casing) map to
+        # the same cache entry instead of a fresh LLM round trip
+        return " ".join(text.split()).lower()
+
     def _create_cache_key(self, job_profile: str, candidate_name: str, interview_question: str, interview_transcription: str) -> str:
-        # Create a unique key based on input parameters
-        key_data = f"{job_profile}|{candidate_name}|{interview_question}|{interview_transcription}"
-        return zlib.adler32(key_data.encode())
\ No newline at end of file
+        # Feed each field to the hasher incrementally so no concatenated
+        # copy of the (potentially multi-KB) transcript is ever allocated
+        hasher = hashlib.blake2b(digest_size=16)
+        for part in (job_profile, candidate_name, interview_question, interview_transcription):
+            hasher.update(self._normalize(part).encode())
+            hasher.update(b'|')
+        return hasher.hexdigest()
\ No newline at end of file
@@ -1,17 +1,48 @@
-import os
+import logging
 import whisper
 import speech_recognition as sr
-from app.config import Settings
+from faster_whisper import WhisperModel
+from app.config import settings
+
+logger = logging.getLogger(__name__)
 
 class TranscriptionService:
-    @staticmethod
-    def audio_to_text(audio_file_path: str) -> str:
-        model = whisper.load_model(Settings.WHISPER_MODEL)
-        result = model.transcribe(audio_file_path)
+    # Loaded once per process so the CTranslate2 weights are memory-mapped
+    # a single time and reused across requests
+    _fast_model = None
+    _model = None
+
+    @classmethod
+    def _get_fast_model(cls):
+        if cls._fast_model is None:
+            cls._fast_model = WhisperModel(settings.WHISPER_MODEL, device="cpu", compute_type="int8")
+        return cls._fast_model
+
+    @classmethod
+    def _get_model(cls):
+        if cls._model is None:
+            cls._model = whisper.load_model(settings.WHISPER_MODEL)
+        return cls._model
+
+    @classmethod
+    def audio_to_text_fast(cls, audio_file_path: str) -> str:
+        segments, _ = cls._get_fast_model().transcribe(audio_file_path, beam_size=1, vad_filter=True)
+        return "".join(segment.text for segment in segments)
+
+    # faster-whisper is the default: same checkpoints, int8 CTranslate2
+    # inference at a fraction of the reference implementation's CPU time
+    @classmethod
+    def audio_to_text(cls, audio_file_path: str) -> str:
+        return cls.audio_to_text_fast(audio_file_path)
+
+    @classmethod
+    def audio_to_text_reference(cls, audio_file_path: str) -> str:
+        # Kept for spot-checking transcripts against the reference decoder
+        result = cls._get_model().transcribe(audio_file_path)
         return result["text"]
     
     def audio_to_text_gcp(audio_file_path):
-        print("Audio file path", audio_file_path)
+        logger.debug("Audio file path %s", audio_file_path)
         recognizer = sr.Recognizer()
         with sr.AudioFile(audio_file_path) as source:
             audio_data = recognizer.record(source)  # Correct method to use recognizer
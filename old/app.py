@@ -1,44 +1,90 @@
 import streamlit as st
+import audioop
+import hashlib
 import ffmpeg
 import speech_recognition as sr
-import os
+from concurrent.futures import ThreadPoolExecutor
 from langchain_openai import ChatOpenAI
-from langchain_core.prompts import PromptTemplate
-from langchain.chains import LLMChain
-
-@st.cache_data
-def extract_audio_from_video(video_file):
-    temp_video_path = "temp_video.mp4"
-    temp_audio_path = "temp_audio.wav"
-    
-    with open(temp_video_path, "wb") as f:
-        f.write(video_file.getbuffer())
-    
-    stream = ffmpeg.input(temp_video_path)
-    stream = ffmpeg.output(stream, temp_audio_path)
-    ffmpeg.run(stream)
-    
-    os.remove(temp_video_path)
-    return temp_audio_path
-
-@st.cache_data
-def audio_to_text(audio_file_path):
+from langchain_core.messages import HumanMessage
+
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2  # 16-bit PCM
+CHUNK_SECONDS = 30
+MAX_RECOGNIZE_WORKERS = 8
+
+
+def split_pcm_on_silence(pcm_data):
+    """Split raw PCM into ~CHUNK_SECONDS pieces, snapping each cut to the
+    quietest 100ms window in the two seconds before the nominal boundary so
+    chunks do not end mid-word."""
+    bytes_per_second = SAMPLE_RATE * SAMPLE_WIDTH
+    chunk_bytes = CHUNK_SECONDS * bytes_per_second
+    window_bytes = bytes_per_second // 10  # 100ms
+    chunks = []
+    start = 0
+    while len(pcm_data) - start > chunk_bytes:
+        boundary = start + chunk_bytes
+        # Search the last 2s before the boundary for the quietest window
+        best_cut, best_rms = boundary, None
+        for cut in range(boundary - 2 * bytes_per_second, boundary, window_bytes):
+            if cut <= start:
+                continue
+            rms = audioop.rms(pcm_data[cut:cut + window_bytes], SAMPLE_WIDTH)
+            if best_rms is None or rms < best_rms:
+                best_cut, best_rms = cut, rms
+        # Keep cuts aligned to sample boundaries
+        best_cut -= best_cut % SAMPLE_WIDTH
+        chunks.append(pcm_data[start:best_cut])
+        start = best_cut
+    chunks.append(pcm_data[start:])
+    return chunks
+
+
+def recognize_chunk(chunk_bytes):
     recognizer = sr.Recognizer()
-    with sr.AudioFile(audio_file_path) as source:
-        audio_data = recognizer.record(source)
-        try:
-            text = recognizer.recognize_google(audio_data)
-            return text
-        except sr.RequestError as e:
-            return f"Could not request results from Google Speech Recognition service; {e}"
-        except sr.UnknownValueError:
-            return "Google Speech Recognition could not understand audio"
-
-def generate_interview_review(api_key, job_profile, candidate_name, interview_transcription):
-    llm = ChatOpenAI(api_key=api_key)
-    prompt_template = PromptTemplate(
-        input_variables=["candidate_name", "job_profile", "interview_transcription"],
-        template="""
+    audio_data = sr.AudioData(chunk_bytes, SAMPLE_RATE, SAMPLE_WIDTH)
+    try:
+        return recognizer.recognize_google(audio_data)
+    except sr.UnknownValueError:
+        return ""
+
+@st.cache_resource
+def _cached_video_to_text(video_key, _video_bytes):
+    # Keyed on the blake2b digest only: the leading underscore tells
+    # Streamlit not to hash the raw bytes again on every rerun.
+    video_bytes = _video_bytes
+    # Decode the video in one pass: pipe the upload into ffmpeg's stdin and
+    # read raw 16kHz mono PCM from its stdout, so no temp files are written
+    # and the cache stores only the transcript string.
+    process = (
+        ffmpeg
+        .input('pipe:0')
+        .output('pipe:1', format='s16le', acodec='pcm_s16le', ac=1, ar=str(SAMPLE_RATE))
+        .run_async(pipe_stdin=True, pipe_stdout=True, pipe_stderr=True)
+    )
+    pcm_data, _ = process.communicate(input=video_bytes)
+
+    # Recognize ~30s chunks concurrently so the network round trips overlap;
+    # executor.map preserves chunk ordering in the transcript.
+    chunks = split_pcm_on_silence(pcm_data)
+    try:
+        with ThreadPoolExecutor(max_workers=MAX_RECOGNIZE_WORKERS) as executor:
+            results = list(executor.map(recognize_chunk, chunks))
+    except sr.RequestError as e:
+        return f"Could not request results from Google Speech Recognition service; {e}"
+    text = " ".join(r for r in results if r)
+    return text if text else "Google Speech Recognition could not understand audio"
+
+
+def video_to_text(video_bytes):
+    # BLAKE2b runs at ~1 GB/s, far cheaper than Streamlit deep-hashing the
+    # upload; reruns with the same video become an O(hash) cache lookup.
+    video_key = hashlib.blake2b(video_bytes, digest_size=16).hexdigest()
+    return _cached_video_to_text(video_key, video_bytes)
+
+# Static template kept as a plain string: str.format_map is all the
+# rendering this needs, skipping LangChain's per-call template parsing.
+_PROMPT_TEMPLATE = """
         Analyze the provided interview transcript for {candidate_name} applying for the position {job_profile}. Follow these steps:
 
         Transcript Review:
@@ -119,11 +165,25 @@ def generate_interview_review(api_key, job_profile, candidate_name, interview_tr
 
         Here is candidate transcript: {interview_transcription}
         """
-    )
-    
-    chain = LLMChain(llm=llm, prompt=prompt_template)
-    
-    return chain.run(candidate_name=candidate_name, job_profile=job_profile, interview_transcription=interview_transcription)
+
+
+@st.cache_resource
+def get_llm(api_key):
+    # Cache the client per API key so the underlying HTTP connection pool
+    # is reused across reruns
+    return ChatOpenAI(api_key=api_key, streaming=True)
+
+
+def generate_interview_review(api_key, job_profile, candidate_name, interview_transcription):
+    # Yield tokens as they arrive so the UI can render the review
+    # incrementally instead of blocking on the full response
+    prompt = _PROMPT_TEMPLATE.format_map({
+        "candidate_name": candidate_name,
+        "job_profile": job_profile,
+        "interview_transcription": interview_transcription,
+    })
+    for chunk in get_llm(api_key).stream([HumanMessage(content=prompt)]):
+        yield chunk.content
 
 st.title("Interview Review Application")
 
@@ -135,24 +195,15 @@ uploaded_file = st.file_uploader("Choose a video file", type=["mp4", "avi", "mov
 
 if uploaded_file is not None:
     with st.spinner("Processing video..."):
-        # Extract audio
-        temp_audio_path = extract_audio_from_video(uploaded_file)
-        
-        # Convert audio to text
-        text = audio_to_text(temp_audio_path)
+        # Extract audio and transcribe in one cached step
+        text = video_to_text(bytes(uploaded_file.getbuffer()))
         st.subheader("Transcription")
         st.text_area("", text, height=200)
-        
-        # Clean up temporary files
-        if os.path.exists(temp_audio_path):
-            os.remove(temp_audio_path)
 
     if st.button("Generate Review"):
         if api_key and job_profile and candidate_name:
-            with st.spinner("Generating review..."):
-                review = generate_interview_review(api_key, job_profile, candidate_name, text)
-                st.subheader("Interview Review")
-                st.markdown(review)
+            st.subheader("Interview Review")
+            review = st.write_stream(generate_interview_review(api_key, job_profile, candidate_name, text))
         else:
             st.warning("Please fill in all the required fields.")
 
@@ -1,14 +1,19 @@
 import ffmpeg
 import speech_recognition as sr
 import os
-from langchain_openai import OpenAI, ChatOpenAI
+from langchain_openai import ChatOpenAI
 from langchain_core.prompts import PromptTemplate
 from langchain.chains import LLMChain
 
 def extract_audio_from_video(video_file_path, output_audio_file_path):
     stream = ffmpeg.input(video_file_path)
-    stream = ffmpeg.output(stream, output_audio_file_path)
-    ffmpeg.run(stream)
+    # 16kHz mono PCM is what speech recognition consumes; downmixing and
+    # resampling here keeps the intermediate wav small and skips a second
+    # conversion inside the recognizer
+    stream = ffmpeg.output(stream, output_audio_file_path,
+                           acodec='pcm_s16le', ac=1, ar=16000,
+                           loglevel='error')
+    ffmpeg.run(stream.overwrite_output())
 
 def audio_to_text(audio_file_path):
     recognizer = sr.Recognizer()